@@ -1,10 +1,25 @@
-from pyClarion import Agent, Input, Choice, FixedRules, Family, Atoms, Atom, Site, FixedRules, Priority, Process, keyform
+from pyClarion import Agent, Input, Choice, FixedRules, Family, Atoms, Atom, Site, FixedRules, Priority, Process, keyform, numdict, NumDict, Index
 from datetime import timedelta
-import statistics
-import matplotlib.pyplot as plt
-import seaborn as sns
+import argparse
+import functools
+import itertools
+import heapq
+import multiprocessing
+import os
+import random
 import numpy as np
 
+# Shared time constants, hoisted so they are not rebuilt inside the event loop
+_DT_ZERO = timedelta()
+_DT_TRIAL = timedelta(seconds=1)
+_DT_TRIGGER = timedelta(milliseconds=50)
+# Trials are laid out on fixed slots of simulated time; a slot must comfortably 
+# exceed the stimulus lead-in plus the slowest decision
+_DT_SLOT = timedelta(seconds=10)
+
+# Model parameters shared by the pyClarion agent and the vectorized race
+THRESHOLD = 4
+SD = 0.2
 
 # Define atoms and structure
 class IO(Atoms):
@@ -19,12 +34,106 @@ class PRWData(Family):
     io: IO
     direction: Direction
 
+
+class DenseSite(Site):
+    """
+    A data site backed by a dense float32 buffer.
+
+    Keys are frozen from the index at construction and mapped to buffer slots, 
+    so the site is only suitable for indices that do not change during a 
+    simulation. In-place additions touch the buffer alone; the NumDict view is 
+    rebuilt lazily, the next time the site is read.
+
+    The site also keeps peak, the running maximum of the buffer. Additions 
+    update it in the same kernel pass that adds, and pushes recompute it, so 
+    threshold checks read a scalar instead of reducing over the site.
+    """
+
+    keys: tuple
+    slots: dict
+    arr: np.ndarray
+    peak: float
+
+    def __init__(self, i: Index, c: float = 0.0) -> None:
+        super().__init__(i, {}, c)
+        self.keys = tuple(i)
+        self.slots = {k: n for n, k in enumerate(self.keys)}
+        # float32 is ample here: accumulation is monotone and positive, and 
+        # values never grow much past the decision threshold.
+        self.arr = np.full(len(self.keys), c, dtype=np.float32)
+        self.peak = float(c)
+        self._stale = False
+        # Deferred so that runs without dense sites skip loading numba
+        from numba_kernels import accum_step, buffer_max
+        self._add = accum_step
+        self._max = buffer_max
+
+    def __iter__(self):
+        self._sync()
+        yield from self.data
+
+    def __getitem__(self, i: int) -> NumDict:
+        self._sync()
+        return self.data[i]
+
+    def _sync(self) -> None:
+        if self._stale:
+            self.data[0] = numdict(self.index, 
+                dict(zip(self.keys, self.arr.tolist())), self.const)
+            self._stale = False
+
+    def _load(self, data: NumDict) -> None:
+        self.arr[:] = self.densify(data)
+        self.peak = self._max(self.arr)
+        self._stale = False
+
+    def densify(self, d: NumDict) -> np.ndarray:
+        """Return the values of d laid out in buffer order."""
+        out = np.full(len(self.keys), d.c, dtype=np.float32)
+        for k, x in d.d.items():
+            n = self.slots.get(k)
+            if n is not None:
+                out[n] = x
+        return out
+
+    def push(self, data: NumDict, index: int = 0, grad: bool = False) -> None:
+        super().push(data, index, grad)
+        if not grad:
+            self._load(data)
+
+    def add_inplace(self, 
+        data: NumDict, 
+        index: int = 0, 
+        grad: bool = False
+    ) -> None:
+        if grad or index != 0:
+            super().add_inplace(data, index, grad)
+            return
+        self.peak = float(self._add(self.arr, self.densify(data), self.arr))
+        self._stale = True
+
+    def update(self, 
+        data: NumDict | dict, 
+        method=Site.push, 
+        index: int = 0, 
+        grad: bool = False
+    ) -> Site.Update:
+        # Route base class write methods to their dense-aware overrides
+        method = {
+            Site.push: DenseSite.push, 
+            Site.add_inplace: DenseSite.add_inplace
+        }.get(method, method)
+        return super().update(data, method, index, grad)
+
+
 # Accumulator process for top-down integration
 class Accumulator(Process):
     """
     Accumulates activation over time from repeated input signals.
     Once the total activation surpasses a threshold, it signals decision readiness.
     """
+    __slots__ = ("main", "input", "threshold", "_fired", "_schedule")
+
     main: Site
     input: Site
     lax = ("input",)
@@ -35,51 +144,78 @@ class Accumulator(Process):
         """
         super().__init__(name)
         self.system.check_root(d, v)
-        idx_d = self.system.get_index(keyform(d))
-        idx_v = self.system.get_index(keyform(v))
-        self.main = Site(idx_d * idx_v, {}, 0)
-        self.input = Site(idx_d * idx_v, {}, 0)
-        self.threshold = threshold
-
-    def update(self, 
-        dt: timedelta = timedelta(), 
-        priority: int = Priority.PROPAGATION
-    ) -> None:
-        """
-        Adds current input to accumulated value and schedules the next update.
-        """
-        
-        main = self.main[0].sum(self.input[0])
-
-        self.system.schedule(self.update,
-            self.main.update(main,),
-            dt=dt, priority=priority)
-
-    def clear(self, dt: timedelta = timedelta(), 
+        # Built once and shared by both sites
+        index = (self.system.get_index(keyform(d)) 
+            * self.system.get_index(keyform(v)))
+        # The index is fixed once check_root passes, so accumulator state is 
+        # kept in a dense buffer rather than a NumDict.
+        self.main = DenseSite(index, 0.0)
+        self.input = Site(index, {}, 0)
+        # Rounded to buffer precision, but kept as a plain float so the peak 
+        # compare (peak is a Python float) avoids numpy scalar dispatch
+        self.threshold = float(np.float32(threshold))
+        self._fired = False
+        # Bound once; saves the system attribute hop on every scheduled event
+        self._schedule = self.system.schedule
+
+    @property
+    def fired(self) -> bool:
+        """True iff the threshold was crossed since the last clear event."""
+        return self._fired
+
+    def clear(self, dt: timedelta = _DT_ZERO, 
         priority: int = Priority.PROPAGATION
     ) -> None:
         """
         Clears the accumulator for the next trial.
         """
-        self.system.schedule(self.clear, self.main.update({}), dt=dt, priority=priority)
+        self._schedule(self.clear, self.main.update({}), dt=dt, priority=priority)
 
-    def above_threshold(self, dt: timedelta = timedelta(), priority: int = Priority.PROPAGATION) -> None:
+    def above_threshold(self, dt: timedelta = _DT_ZERO, priority: int = Priority.PROPAGATION) -> None:
         """
         Signals that the threshold has been crossed.
+
+        Fires at most once per clear cycle; once signalled, the accumulator 
+        stops integrating input until the next clear event.
         """
-        self.system.schedule(self.above_threshold, dt=dt, priority=priority)
+        self._schedule(self.above_threshold, dt=dt, priority=priority)
 
     def resolve(self, event) -> None:
         """
-        Handles incoming events and triggers updates. Also triggers an above_threshold check 
-        if an accumulation site reaches the threshold.
+        Handles incoming events and integrates new input. Also triggers an 
+        above_threshold check if an accumulation site reaches the threshold.
         """
-        updates = [ud for ud in event.updates if isinstance(ud, Site.Update)]
+        updates = event.updates
+        if not updates:
+            # Events without updates cannot touch the input site, and clear 
+            # always carries a site update.
+            return
 
-        if self.input.affected_by(*updates):
-            self.update()
+        src = event.source
+        if src == self.clear:
+            self._fired = False
 
-        if event.source == self.update and self.main[0].max().c > self.threshold:
+        if self._fired:
+            return
+
+        if self.input.affected_by_any(event.site_updates):
+            self.integrate()
+
+    def integrate(self) -> None:
+        """
+        Adds current input to accumulated value immediately.
+
+        No event is scheduled for the addition itself: the dense buffer is 
+        modified in place and only a threshold crossing is announced, via 
+        above_threshold(). Nothing else reacts to changes in main between 
+        crossings, so no event is needed to carry the addition.
+        """
+        self.main.add_inplace(self.input[0])
+        self._check_threshold()
+
+    def _check_threshold(self) -> None:
+        if self.main.peak > self.threshold:
+            self._fired = True
             self.above_threshold()
 
 
@@ -88,6 +224,8 @@ class AccumulationAgent(Agent):
     """
     A Clarion agent that accumulates evidence from input chunks and makes decisions based on a threshold.
     """
+    __slots__ = ("accumulator", "data_in", "choice", "fixed_rules", "_handlers")
+
     accumulator: Accumulator
     data_in: Input
     choice: Choice
@@ -98,109 +236,309 @@ class AccumulationAgent(Agent):
         Initialize a new pyClarion Agent with Accumulation.
         """
         super().__init__(name, **families)
+        data, p = families["d"], families["p"]
 
         with self:
             self.data_in = Input("data_in", (data, data))
-            self.fixed_rules = FixedRules("fixed_rules", p=p, r=data, c=data, d=data, v=data, sd=0.2)
-            self.choice = Choice('choice', p, (data.io.output, data.direction), sd=0.2)
-            self.accumulator = Accumulator("accumulator", data.io.output, data.direction, threshold=4)
+            self.fixed_rules = FixedRules("fixed_rules", p=p, r=data, c=data, d=data, v=data, sd=SD)
+            self.choice = Choice('choice', p, (data.io.output, data.direction), sd=SD)
+            self.accumulator = Accumulator("accumulator", data.io.output, data.direction, threshold=THRESHOLD)
             self.fixed_rules.rules.lhs.bu.input = self.data_in.main
             self.accumulator.input = self.fixed_rules.rules.rhs.td.main
             self.choice.input = self.accumulator.main
 
+        # Bound methods hash and compare by (__self__, __func__), so event 
+        # sources can be dispatched through a dict instead of an if-chain.
+        self._handlers = {
+            self.accumulator.above_threshold: self.choice.select,
+            self.choice.select: self.end_trial,
+        }
+
     def resolve(self, event):
         """
         Handles event triggering and resets for new trials.
         """
-        if event.source == agent.accumulator.above_threshold:
-            self.choice.select()
-        
-        if event.source == self.choice.select:
-            agent.system.queue.clear()
-            self.accumulator.clear()
-
+        handler = self._handlers.get(event.source)
+        if handler is not None:
+            handler()
 
-# Initialize agent and model components
-p = Family()
-data = PRWData()
-agent = AccumulationAgent("agent", d=data, p=p)
+    def end_trial(self):
+        """
+        Drops pending events and clears the accumulator after a decision.
 
-io = data.io
-direction = data.direction
+        Only events of the current trial are dropped. Trials are queued back 
+        to back and each one opens with an accumulator clear or a stimulus, 
+        so the current trial's leftovers are exactly the events ahead of the 
+        first of those on the heap; they are popped off directly, leaving the 
+        rest of the queue untouched.
+        """
+        queue = self.system.queue
+        starts = (self.accumulator.clear, self.data_in.send)
+        while queue and queue[0].source not in starts:
+            heapq.heappop(queue)
+        self.accumulator.clear()
 
-# Define decision rules
-rule_defs = [
-    + io.input ** direction('X')
-    >>
-    + io.output ** direction("X")
-]
 
-# Generate 200 trials (100 per category)
-trials = (
-    [+ io.input ** direction.left for _ in range(100)] +
-    [+ io.input ** direction.right for _ in range(100)]
-)
+@functools.cache
+def build_agent():
+    """
+    Build the agent and compile its decision rules.
 
-agent.fixed_rules.rules.compile(*rule_defs)
+    Rule compilation is a one-time cost paid up front, before any trial runs, 
+    and the compiled agent is cached so that repeated calls (e.g., from an 
+    interactive session) reuse it. Callers share the returned agent.
+    """
+    p = Family()
+    data = PRWData()
+    agent = AccumulationAgent("agent", d=data, p=p)
+
+    io = data.io
+    direction = data.direction
+
+    # Define decision rules
+    rule_defs = [
+        + io.input ** direction('X')
+        >>
+        + io.output ** direction("X")
+    ]
+
+    agent.fixed_rules.rules.compile(*rule_defs)
+    # Process the compilation events now so rule weights are in place
+    while agent.system.queue:
+        agent.system.advance()
 
-results = []
+    return agent, data
 
-dt = timedelta(seconds=1)
 
-# Run simulation across all trials
-for trial in trials:
-    agent.accumulator.clear()
+def simulate_agent(n_per_category=100):
+    """
+    Run trials through the full pyClarion event simulation.
 
-    agent.data_in.send(trial)
+    Returns decision times in seconds and choices, one per trial, with left 
+    trials first. Decision times are measured from the start of the run.
+    """
+    agent, data = build_agent()
+
+    io = data.io
+    direction = data.direction
+
+    # Trials within a category are identical, so each stimulus chunk is built 
+    # once and repeated
+    left = + io.input ** direction.left
+    right = + io.input ** direction.right
+    trials = itertools.chain(
+        itertools.repeat(left, n_per_category), 
+        itertools.repeat(right, n_per_category))
+
+    n = 2 * n_per_category
+    end_times = np.full(n, np.nan)
+    choices = [None] * n
+    # The agent is shared across calls, so the clock need not start at zero
+    start = agent.system.clock.time
+
+    def record_choice(event, poll=agent.choice.poll):
+        """Record the decision of the current trial."""
+        t = event.time - start
+        i = t // _DT_SLOT
+        end_times[i] = t.total_seconds()
+        choices[i] = poll()
+
+    def retrigger(event, trigger=agent.fixed_rules.trigger, acc=agent.accumulator):
+        """Keep the rule store firing until a decision is made."""
+        if not acc.fired:
+            trigger(dt=_DT_TRIGGER)
+
+    # Driver-level dispatch table
+    drivers = {
+        agent.choice.select: record_choice,
+        agent.fixed_rules.trigger: retrigger,
+    }
+
+    # Bind hot attribute chains once; the queue list is cleared in place, 
+    # never replaced, so holding a reference to it is safe
+    queue = agent.system.queue
+    advance = agent.system.advance
+    get_driver = drivers.get
+    clear = agent.accumulator.clear
+    send = agent.data_in.send
+    trigger = agent.fixed_rules.trigger
+
+    # Schedule all trials up front, one per slot; each trial's stimulus onset 
+    # is _DT_TRIAL after its slot begins
+    for i, trial in enumerate(trials):
+        offset = i * _DT_SLOT
+        # The accumulator starts out clear (end_trial clears it after every 
+        # decision), so the first trial needs no clear event
+        if i:
+            clear(dt=offset)
+        send(trial, dt=offset)
+        trigger(dt=offset + _DT_TRIAL)
+
+    # Run simulation across all trials in a single drain loop
+    while queue:
+        event = advance()
+
+        driver = get_driver(event.source)
+        if driver is not None:
+            driver(event)
+
+    # A trial that never reaches a decision within its slot would otherwise 
+    # pass silently into the statistics
+    missing = [i for i, choice in enumerate(choices) 
+        if choice is None or np.isnan(end_times[i])]
+    if missing:
+        raise RuntimeError(f"No decision recorded for trials {missing}")
+
+    return end_times, choices
+
+
+def _simulate_shard(shard):
+    """Worker entry point for simulate_agent_parallel()."""
+    n_per_category, seed = shard
+    random.seed(seed)
+    return simulate_agent(n_per_category)
+
+
+def simulate_agent_parallel(n_per_category=100, jobs=None, seed=None):
+    """
+    Run trials through the full pyClarion event simulation in worker processes.
 
-    agent.fixed_rules.trigger(dt=timedelta(seconds=1))
+    Trials are independent, so they are split into shards, each simulated by 
+    simulate_agent() on an agent built inside its worker. Workers seed the 
+    random module from a SeedSequence spawned off seed: a seeded run is 
+    reproducible for a given number of jobs, but differs from a serial run.
 
-    while agent.system.queue:
-        event = agent.system.advance()
-
-        if event.source == agent.choice.select:
-            results.append((event.time, agent.choice.poll()))
-            break
-
-        if event.source == agent.fixed_rules.trigger:
-            agent.fixed_rules.trigger(dt=timedelta(0, 0, 0, 50))
-
-# Compute reaction times based on stimulus-to-decision timing
-rts = []
-last_end_time = timedelta(seconds=0)
-
-for (end_time, _) in results:
-    trial_start_time = last_end_time + timedelta(seconds=1)
-    rt = (end_time - trial_start_time).total_seconds()
-    rts.append(rt)
-    last_end_time = end_time
-
-# Add residual motor time
-for i in range(len(rts)):
-    rts[i] = rts[i] + 0.239
-
-# Print RT statistics
-mean_rt = statistics.mean(rts)
-median_rt = statistics.median(rts)
-stdev_rt = statistics.stdev(rts)
-
-print(f"Mean RT: {mean_rt:.3f} seconds")
-print(f"Median RT: {median_rt:.3f} seconds")
-print(f"Standard Deviation: {stdev_rt:.3f} seconds")
-
-min_rt = min(rts)
-max_rt = max(rts)
-print(f"Min RT: {min_rt:.3f}s, Max RT: {max_rt:.3f}s")
-
-# Plot RT distribution
-plt.figure(figsize=(8, 5))
-sns.kdeplot(rts, fill=True, linewidth=2)
-plt.title("Reaction Time Distribution")
-plt.xlabel("RT (seconds)")
-plt.ylabel("Density")
-plt.grid(axis='y', linestyle='--', alpha=0.6)
-plt.tight_layout()
-plt.axvline(np.mean(rts), color='red', linestyle='--', label=f"Mean RT: {np.mean(rts):.3f}s")
-plt.legend()
-plt.savefig("reaction_time_kde.png")
-plt.close()
\ No newline at end of file
+    Returns the same as simulate_agent(), except that decision times are 
+    measured from the start of each shard.
+    """
+    jobs = max(1, min(jobs or os.cpu_count() or 1, n_per_category))
+    q, r = divmod(n_per_category, jobs)
+    sizes = [q + (k < r) for k in range(jobs)]
+    seeds = [int(ss.generate_state(1)[0]) 
+        for ss in np.random.SeedSequence(seed).spawn(jobs)]
+
+    with multiprocessing.Pool(jobs) as pool:
+        shards = pool.map(_simulate_shard, zip(sizes, seeds))
+
+    # Each shard lists its left trials before its right trials; regroup so 
+    # that all left trials come first, as in simulate_agent()
+    end_times = np.concatenate(
+        [t[:m] for (t, _), m in zip(shards, sizes)] 
+        + [t[m:] for (t, _), m in zip(shards, sizes)])
+    choices = (
+        [c for (_, cs), m in zip(shards, sizes) for c in cs[:m]] 
+        + [c for (_, cs), m in zip(shards, sizes) for c in cs[m:]])
+    return end_times, choices
+
+
+def simulate_race(n_per_category=100, threshold=THRESHOLD, sd=SD, 
+    strength=0.5, n_inert=2, dt=_DT_TRIGGER.total_seconds(), max_steps=100, 
+    rng=None
+):
+    """
+    Simulate the agent's evidence race for all trials at once with NumPy.
+
+    Mirrors simulate_agent() step for step: every dt, the rule store picks 
+    the argmax of its noisy rule activations (strength for the rule matching 
+    the stimulus, zero for the other direction rule and for n_inert rules 
+    that move neither accumulator) and the winning direction gains one unit 
+    of evidence. A trial ends on the first step where either accumulator 
+    exceeds threshold, at which point a noisy choice is read off the 
+    accumulators.
+
+    Returns decision times in seconds (from stimulus onset) and chosen 
+    directions (0 for left, 1 for right), left trials first.
+    """
+    rng = np.random.default_rng() if rng is None else rng
+    n = 2 * n_per_category
+    target = np.repeat([0, 1], n_per_category)
+
+    # All noise for the run is drawn up front in one batch
+    sample = rng.standard_normal((n, max_steps, 2 + n_inert), dtype=np.float32)
+    sample *= sd
+    sample[np.arange(n), :, target] += strength
+    winner = sample.argmax(axis=2)
+
+    left = (winner == 0).cumsum(axis=1)
+    right = (winner == 1).cumsum(axis=1)
+    crossed = np.maximum(left, right) > threshold
+    if not crossed[:, -1].all():
+        raise RuntimeError(f"Race undecided after {max_steps} steps")
+    first = crossed.argmax(axis=1)
+
+    rows = np.arange(n)
+    final = np.stack([left[rows, first], right[rows, first]], axis=1)
+    noise = rng.standard_normal(final.shape, dtype=np.float32)
+    choices = (final + sd * noise).argmax(axis=1)
+
+    return (first + 1) * dt, choices
+
+
+def plot_rts(rts, mean_rt, path="reaction_time_dist.png"):
+    """Save a histogram of the RT distribution."""
+    # Imported here; pyplot is slow to load and only needed with --plot
+    import matplotlib.pyplot as plt
+
+    plt.figure(figsize=(8, 5))
+    plt.hist(rts, bins=30, density=True, alpha=0.6)
+    plt.title("Reaction Time Distribution")
+    plt.xlabel("RT (seconds)")
+    plt.ylabel("Density")
+    plt.grid(axis='y', linestyle='--', alpha=0.6)
+    plt.tight_layout()
+    plt.axvline(mean_rt, color='red', linestyle='--', label=f"Mean RT: {mean_rt:.3f}s")
+    plt.legend()
+    plt.savefig(path)
+    plt.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Simulate reaction times of an evidence accumulation agent.")
+    parser.add_argument("--reference", action="store_true",
+        help="run the full pyClarion event simulation instead of the vectorized "
+            "race (slow; for validation)")
+    parser.add_argument("--seed", type=int, default=None,
+        help="seed the random number generators for a reproducible run")
+    parser.add_argument("--jobs", type=int, default=None, metavar="N",
+        help="with --reference, split trials across N worker processes "
+            "(0 for one per CPU)")
+    parser.add_argument("--plot", action="store_true",
+        help="save a histogram of the RT distribution to reaction_time_dist.png")
+    args = parser.parse_args()
+
+    if args.reference:
+        # pyClarion draws its noise from the random module
+        if args.jobs is None:
+            random.seed(args.seed)
+            end_times, choices = simulate_agent()
+        else:
+            end_times, choices = simulate_agent_parallel(
+                jobs=args.jobs, seed=args.seed)
+
+        # Compute reaction times based on stimulus-to-decision timing; each 
+        # trial's stimulus onset is _DT_TRIAL into the slot its decision fell in
+        slot = _DT_SLOT.total_seconds()
+        rts = end_times % slot - _DT_TRIAL.total_seconds()
+    else:
+        rts, choices = simulate_race(rng=np.random.default_rng(args.seed))
+
+    # Add residual motor time
+    rts = rts + 0.239
+
+    # Print RT statistics
+    mean_rt = rts.mean()
+    median_rt = np.median(rts)
+    stdev_rt = rts.std(ddof=1)
+
+    print(f"Mean RT: {mean_rt:.3f} seconds")
+    print(f"Median RT: {median_rt:.3f} seconds")
+    print(f"Standard Deviation: {stdev_rt:.3f} seconds")
+
+    min_rt = rts.min()
+    max_rt = rts.max()
+    print(f"Min RT: {min_rt:.3f}s, Max RT: {max_rt:.3f}s")
+
+    # Plot RT distribution
+    if args.plot:
+        plot_rts(rts, mean_rt)
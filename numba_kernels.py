@@ -0,0 +1,63 @@
+"""
+Compiled kernels for dense accumulator buffers.
+
+Kernels are JIT-compiled with numba when it is installed and run as plain 
+Python otherwise. Compiled code is cached on disk, so the compile cost is paid 
+once per machine; set NUMBA_DISABLE_JIT=1 to skip compilation altogether 
+(e.g., for quick test runs).
+"""
+
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError: # numba is optional; kernels below run as plain Python
+    def njit(*args, **kwargs):
+        if args and callable(args[0]):
+            return args[0]
+        return lambda f: f
+
+
+# Fast-math flags for all kernels; fastmath=True would also set ninf and nnan, 
+# letting the compiler assume away the -inf sentinel in accum_step
+FASTMATH = {"nsz", "arcp", "contract", "afn", "reassoc"}
+
+
+@njit("float32(float32[:], float32[:], float32[:])", cache=True, 
+    fastmath=FASTMATH)
+def accum_step(a, b, out):
+    """Compute out = a + b over dense accumulator buffers; return max(out)."""
+    m = np.float32(-np.inf)
+    for i in range(a.shape[0]):
+        out[i] = a[i] + b[i]
+        if out[i] > m:
+            m = out[i]
+    return m
+
+
+@njit("float32(float32[:])", cache=True, fastmath=FASTMATH)
+def _maxf32(a):
+    """Return the maximum of a non-empty float32 buffer."""
+    m = a[0]
+    for i in range(1, a.shape[0]):
+        x = a[i]
+        if x > m:
+            m = x
+    return m
+
+
+def buffer_max(a):
+    """
+    Return max(a), picking the cheaper reduction for the buffer size.
+
+    Empty buffers give -inf, as in accum_step.
+    """
+    n = a.shape[0]
+    if n == 0:
+        # _maxf32 reads a[0] unchecked
+        return -np.inf
+    # The inline kernel wins on tiny buffers, where NumPy's dispatch overhead 
+    # dominates; from 64 elements NumPy's SIMD reduction takes over.
+    if n < 64:
+        return float(_maxf32(a))
+    return float(a.max())
@@ -1,8 +1,10 @@
 from typing import Any, ClassVar, overload, Callable, Protocol
 from datetime import timedelta
+from math import fsum
+from weakref import WeakKeyDictionary
 
 from .base import V, DV, DualRepMixin, ParamMixin
-from ..system import Process, Event, Priority, Site
+from ..system import Process, Event, Priority, Site, UpdateSort
 from ..knowledge import (Family, Sort, Chunks, Term, Atoms, Atom, Chunk, Var)
 from ..numdicts import Key, KeyForm, numdict, NumDict, keyform
 
@@ -42,6 +44,7 @@ class Input(DualRepMixin, Process):
 
     main: Site
     reset: bool
+    _parsed: WeakKeyDictionary[Chunk, dict[Key, float]]
 
     def __init__(self, 
         name: str, 
@@ -55,6 +58,18 @@ class Input(DualRepMixin, Process):
         index, = self._init_indexes(s) 
         self.main = Site(index, {}, c, lags)
         self.reset = reset
+        self._parsed = WeakKeyDictionary()
+
+    def resolve(self, event: Event) -> None:
+        # Only sort updates can invalidate parsed chunks; events carrying site 
+        # updates alone, the common case, are passed over without a scan
+        if len(event.site_updates) == len(event.updates):
+            return
+        index = self.main.index
+        if any(isinstance(ud, UpdateSort) and index.depends_on(ud.sort) 
+            for ud in event.updates):
+            # Parsed chunks were validated against the old index
+            self._parsed.clear()
 
     @overload
     def send(self, d: dict[Term, float], 
@@ -96,6 +111,13 @@ class Input(DualRepMixin, Process):
             dt=dt, priority=priority)
 
     def _parse_input(self, d: dict | Chunk) -> dict[Key, float]:
+        # Chunks are immutable, so their parses are cached; the result is 
+        # only ever read, so it is safe to hand out the cached dict
+        if isinstance(d, Chunk):
+            data = self._parsed.get(d)
+            if data is None:
+                data = self._parsed[d] = self._parse_chunk(d)
+            return data
         data = {}
         if isinstance(d, dict):
             for k, v in d.items():
@@ -105,14 +127,17 @@ class Input(DualRepMixin, Process):
                 if k not in self.main.index:
                     raise ValueError(f"Unexpected key {k}")
                 data[k] = v
-        if isinstance(d, Chunk):
-            for (t1, t2), weight in d._dyads_.items():
-                if isinstance(t1, Var) or isinstance(t2, Var):
-                    raise TypeError("Var not allowed in input chunk.")
-                key = ~t1 * ~t2
-                if key not in self.main.index:
-                    raise ValueError(f"Unexpected dimension-value pair {key}")
-                data[key] = weight
+        return data
+
+    def _parse_chunk(self, d: Chunk) -> dict[Key, float]:
+        data = {}
+        for (t1, t2), weight in d._dyads_.items():
+            if isinstance(t1, Var) or isinstance(t2, Var):
+                raise TypeError("Var not allowed in input chunk.")
+            key = ~t1 * ~t2
+            if key not in self.main.index:
+                raise ValueError(f"Unexpected dimension-value pair {key}")
+            data[key] = weight
         return data
 
 
@@ -135,6 +160,7 @@ class Choice(ParamMixin, DualRepMixin, Process):
     bias: Site
     sample: Site
     params: Site
+    _sd: tuple[float, NumDict] | None
 
     def __init__(self, 
         name: str, 
@@ -152,6 +178,7 @@ class Choice(ParamMixin, DualRepMixin, Process):
         self.bias = Site(index, {}, 0.0)
         self.sample = Site(index, {}, float("nan"))
         self.by = self._init_by(s)
+        self._sd = None
 
     @staticmethod
     def _init_by(s: V | DV) -> KeyForm:
@@ -192,8 +219,11 @@ class Choice(ParamMixin, DualRepMixin, Process):
         See Choice.trigger() for a safer option.
         """
         input = self.bias[0].sum(self.input[0])
-        sd = numdict(self.main.index, {}, c=self.params[0][~self.p.sd])
-        sample = input.normalvariate(sd)
+        # The sd numdict is rebuilt only when the parameter value changes
+        val = self.params[0][~self.p.sd]
+        if self._sd is None or self._sd[0] != val:
+            self._sd = (val, numdict(self.main.index, {}, c=val))
+        sample = input.normalvariate(self._sd[1])
         choices = sample.argmax(by=self.by)
         self.system.schedule(
             self.select,
@@ -281,9 +311,9 @@ class Pool(ParamMixin, DualRepMixin, Process):
         return self.inputs[~self.p[name]]
         
     def resolve(self, event: Event) -> None:
-        updates = [ud for ud in event.updates if isinstance(ud, Site.Update)]
-        if (self.params.affected_by(*updates) \
-            or any(site.affected_by(*updates) 
+        updates = event.site_updates
+        if (self.params.affected_by_any(updates) \
+            or any(site.affected_by_any(updates) 
                 for site in self.inputs.values())):
             self.update()
 
@@ -357,6 +387,7 @@ class BottomUp(Process):
     max_by: KeyForm
     pre: Callable[[NumDict], NumDict] | None
     post: Callable[[NumDict], NumDict] | None
+    _plan: tuple[NumDict, list[tuple[Key, list[list[tuple[float, Key]]]]]] | None
 
     def __init__(self, 
         name: str, 
@@ -380,12 +411,39 @@ class BottomUp(Process):
         self.max_by = keyform(c) * keyform(d) * keyform(v, -1)
         self.pre = pre
         self.post = post
+        self._plan = None
 
     def resolve(self, event: Event) -> None:
-        updates = [ud for ud in event.updates if isinstance(ud, Site.Update)]
-        if self.input.affected_by(*updates):
+        if self.weights.affected_by(*event.updates):
+            self._plan = None
+        if self.input.affected_by_any(event.site_updates):
             self.update()
 
+    def _compile_plan(self) -> list[tuple[Key, list[list[tuple[float, Key]]]]]:
+        """
+        Flatten current weights into a propagation plan.
+
+        The plan lists, for each output key, its max-groups of (weight, input 
+        key) pairs. 
+        
+        Propagation plans front-load the key reductions of the equivalent 
+        NumDict method chain (here mul, max, then sum over weights), so they 
+        are paid once per weight change instead of once per propagation. Plan 
+        keys are reductions of index keys, so NumDicts built from a plan skip 
+        membership checks.
+        """
+        weights = self.weights[0]
+        to_input = self.input.index.kf.reductor(self.mul_by)
+        to_group = self.max_by.reductor(weights.i.kf)
+        to_main = self.sum_by.reductor(self.max_by)
+        groups: dict[Key, list[tuple[float, Key]]] = {}
+        for k, w in weights.d.items():
+            groups.setdefault(to_group(k), []).append((w, to_input(k)))
+        plan: dict[Key, list[list[tuple[float, Key]]]] = {}
+        for k, group in groups.items():
+            plan.setdefault(to_main(k), []).append(group)
+        return list(plan.items())
+
     def update(self, 
         dt: timedelta = timedelta(), 
         priority: int = Priority.PROPAGATION
@@ -393,11 +451,15 @@ class BottomUp(Process):
         input = self.input[0]
         if self.pre is not None:
             input = self.pre(input)
-        main = (self.weights[0]
-            .mul(input, by=self.mul_by)
-            .max(by=self.max_by)
-            .sum(by=self.sum_by)
-            .with_default(c=0.0))
+        weights = self.weights[0]
+        if self._plan is None or self._plan[0] is not weights:
+            self._plan = (weights, self._compile_plan())
+        d, c = input.d, input.c
+        main = NumDict(self.main.index, 
+            {k: fsum(max(w * d.get(x, c) for w, x in group) 
+                for group in groups) 
+             for k, groups in self._plan[1]}, 
+            0.0, False)
         if self.post is not None:
             main = self.post(main)
         self.system.schedule(self.update, 
@@ -425,6 +487,7 @@ class TopDown(Process):
     pre: Callable[[NumDict], NumDict] | None
     post: Callable[[NumDict], NumDict] | None
     agg: AggFunc
+    _plan: tuple[NumDict, list[tuple[Key, list[tuple[Key, float, Key]]]]] | None
 
     @staticmethod
     def CAM(self: NumDict, *, by: KeyForm) -> NumDict:
@@ -455,12 +518,29 @@ class TopDown(Process):
         self.pre = pre
         self.post = post
         self.agg = agg         
+        self._plan = None
 
     def resolve(self, event: Event) -> None:
-        updates = [ud for ud in event.updates if isinstance(ud, Site.Update)]
-        if self.input.affected_by(*updates):
+        if self.weights.affected_by(*event.updates):
+            self._plan = None
+        if self.input.affected_by_any(event.site_updates):
             self.update()
 
+    def _compile_plan(self) -> list[tuple[Key, list[tuple[Key, float, Key]]]]:
+        """
+        Flatten current weights into a propagation plan.
+
+        The plan lists, for each output key, its (key, weight, input key) 
+        triples; see BottomUp._compile_plan().
+        """
+        weights = self.weights[0]
+        to_input = self.input.index.kf.reductor(self.mul_by)
+        to_main = self.maxmin_by.reductor(weights.i.kf)
+        plan: dict[Key, list[tuple[Key, float, Key]]] = {}
+        for k, w in weights.d.items():
+            plan.setdefault(to_main(k), []).append((k, w, to_input(k)))
+        return list(plan.items())
+
     def update(self, 
         dt: timedelta = timedelta(), 
         priority: int = Priority.PROPAGATION
@@ -468,10 +548,27 @@ class TopDown(Process):
         input = self.input[0]
         if self.pre is not None:
             input = self.pre(input)
-        cf = self.weights[0].mul(input, by=self.mul_by)
-        if self.post is not None:
-            cf = self.post(cf)
-        main = self.agg(cf, by=self.maxmin_by).with_default(c=0.0)
+        weights = self.weights[0]
+        if self._plan is None or self._plan[0] is not weights:
+            self._plan = (weights, self._compile_plan())
+        d, c = input.d, input.c
+        if self.post is None \
+            and getattr(self.agg, "__func__", self.agg) is TopDown.CAM:
+            # Default pipeline: fuse products and CAM into a single pass over 
+            # the plan with no intermediate NumDicts
+            data = {}
+            for k, group in self._plan[1]:
+                cf = [w * d.get(x, c) for _, w, x in group]
+                data[k] = max(max(cf), 0.0) + min(min(cf), 0.0)
+            main = NumDict(self.main.index, data, 0.0, False)
+        else:
+            cf = NumDict(weights.i, 
+                {k: w * d.get(x, c) 
+                    for _, group in self._plan[1] for k, w, x in group}, 
+                weights.c * c, False)
+            if self.post is not None:
+                cf = self.post(cf)
+            main = self.agg(cf, by=self.maxmin_by).with_default(c=0.0)
         self.system.schedule(self.update, 
             self.main.update(main),
             dt=dt, priority=priority)
@@ -1,5 +1,6 @@
 from typing import Type, Sequence, Self, Any, Callable
 from datetime import timedelta
+from math import isnan
 
 from .base import Layer, Optimizer, ErrorSignal, Activation, Train
 from .activations import Tanh
@@ -8,8 +9,8 @@ from .optimizers import SGD, Adam
 
 from ..base import D, V, DV
 from ...system import Process, Event, Site, Priority
-from ...knowledge import Family, Atoms, Atom
-from ...numdicts import NumDict
+from ...knowledge import Family, Atoms
+from ...numdicts import NumDict, Key
 
 
 __all__ = [
@@ -37,6 +38,7 @@ class MLP(Process):
     olayer: Layer
     layers: list[Layer]
     optimizer: Optimizer
+    _handlers: dict[Callable, Callable[[], None]]
 
     def __init__(self, 
         name: str, 
@@ -58,30 +60,34 @@ class MLP(Process):
         self.layers = []
         self.optimizer = optimizer(f"{name}.optimizer", p, **kwargs)
         lkwargs = {"afunc": afunc, "l": l, "train": train, "init_sd": init_sd}
-        with self.optimizer:
+        # Untrained networks do not register layers with the optimizer, so no 
+        # optimizer state is allocated for them
+        with self.optimizer if train else self:
             if not layers:
                 self.ilayer = Layer(f"{name}.layer", s1, s2, **lkwargs)
                 self.olayer = self.ilayer
             else:
-                hs = []
-                for i, n in enumerate(layers):
-                    hs.append(self._mk_hidden_nodes(h, i, n))
+                hs = [self._mk_hidden_nodes(h, i, n) 
+                    for i, n in enumerate(layers)]
                 self.ilayer = Layer(f"{name}.ilayer", s1, hs[0], **lkwargs)
-                hi = hs[0]
-                layer = self.ilayer 
-                for i, ho in enumerate(hs[1:]):
-                    layer = layer >> Layer(f"{name}.l{i}", hi, ho, **lkwargs)
-                    self.layers.append(layer)
-                    hi = ho
+                self.layers = [Layer(f"{name}.l{i}", hi, ho, **lkwargs) 
+                    for i, (hi, ho) in enumerate(zip(hs, hs[1:]))]
                 lkwargs.pop("afunc")
-                self.olayer = layer >> Layer(f"{name}.olayer", hi, s2, **lkwargs)
+                self.olayer = Layer(f"{name}.olayer", hs[-1], s2, **lkwargs)
+                # Wire the chain directly; this is what Layer >> Layer does
+                chain = [self.ilayer, *self.layers, self.olayer]
+                for src, dst in zip(chain, chain[1:]):
+                    dst.input = src.main
         self.input = Site(self.ilayer.input.index, {}, self.ilayer.input.const)
+        # Event source -> follow-up
+        self._handlers = {}
+        if train:
+            self._handlers[self.ilayer.backward] = self.optimizer.update
 
     def _mk_hidden_nodes(self, h: Family, l: int, n: int) -> Hidden:
         hidden = type(self).Hidden()
         h[f"{self.name}.h{l}"] = hidden
-        for _ in range(n):
-            hidden[f"n{next(hidden._counter_)}"] = Atom()
+        hidden._bulk_add_(n)
         return hidden
     
     def __rshift__[T: Process](self: Self, other: T) -> T:
@@ -94,10 +100,8 @@ class MLP(Process):
             self.input = other
             return self
         if isinstance(other, Process):
-            try:
-                self.input = getattr(other, "main")
-            except AttributeError:
-                raise
+            # Raises AttributeError for processes without a main site
+            self.input = other.main # type: ignore
             return self
         return NotImplemented
 
@@ -107,19 +111,64 @@ class MLP(Process):
             layer.init_weights()
         self.olayer.init_weights()
 
+    def compile(self) -> None:
+        """Build propagation plans for all layers now rather than on first use."""
+        self.ilayer.compile()
+        for layer in self.layers:
+            layer.compile()
+        self.olayer.compile()
+
+    def freeze(self) -> None:
+        """Fix all layer parameters at their current values for inference."""
+        self.ilayer.freeze()
+        for layer in self.layers:
+            layer.freeze()
+        self.olayer.freeze()
+
+    def thaw(self) -> None:
+        """Resume training of all layers after a call to freeze()."""
+        self.ilayer.thaw()
+        for layer in self.layers:
+            layer.thaw()
+        self.olayer.thaw()
+
+    def evaluate(self, 
+        inputs: Sequence[NumDict | dict[Key, float]]
+    ) -> list[NumDict]:
+        """
+        Compute network outputs for a batch of inputs.
+
+        Unlike update(), no events are scheduled and no sites are updated; 
+        each layer looks up its parameters once for the whole batch. Inputs 
+        given as dicts are read against the index of the network input.
+        """
+        xs = [x if isinstance(x, NumDict) else self.ilayer.input.new(x) 
+            for x in inputs]
+        layers = [self.ilayer, *self.layers]
+        if self.olayer is not self.ilayer:
+            layers.append(self.olayer)
+        for layer in layers:
+            xs = layer.evaluate(xs)
+        return xs
+
     def resolve(self, event: Event) -> None:
-        updates = [ud for ud in event.updates if isinstance(ud, Site.Update)]
-        if self.input.affected_by(*updates):
+        if self.input.affected_by_any(event.site_updates):
             self.update()
-        if event.source == self.ilayer.backward:
-            self.optimizer.update()
+        handler = self._handlers.get(event.source)
+        if handler is not None:
+            handler()
 
     def update(self, 
         dt: timedelta = timedelta(), 
         priority: Priority = Priority.PROPAGATION
     ) -> None:
-        self.system.schedule(self.update, 
-            self.ilayer.input.update(self.input[0].d),
+        input, site = self.input[0], self.ilayer.input
+        # Data matching the layer input need not be re-keyed or re-validated
+        data: NumDict | dict[Key, float] = input.d
+        if input.i == site.index and (input.c == site.const 
+            or isnan(input.c) and isnan(site.const)):
+            data = NumDict(site.index, data, input.c, False)
+        self.system.schedule(self.update, site.update(data),
             dt=dt, priority=priority)
 
 
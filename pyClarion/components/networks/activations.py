@@ -1,3 +1,5 @@
+import math
+
 from ...numdicts import NumDict
 from .base import Layer
 from .base import Activation
@@ -10,7 +12,10 @@ class Tanh(Activation):
         return d.tanh()
 
     def grad(self, d: NumDict) -> NumDict:
-        return d.cosh().inv().pow(x=2.0)
+        # sech^2, in one pass rather than via d.cosh().inv().pow(x=2.0)
+        sech2 = {k: math.pow(1 / math.cosh(v), 2.0) for k, v in d.d.items()}
+        c = math.pow(1 / math.cosh(d.c), 2.0)
+        return type(d)(d.i, sech2, c, False)
 
     def scale(self, layer: Layer) -> float:
         return 1 / (1 + len(layer.input[0]) + len(layer.main[0]))
@@ -1,11 +1,15 @@
-from typing import Self
+from typing import Self, Sequence
 from datetime import timedelta
 from enum import Flag, auto
+from itertools import repeat
+from random import normalvariate
+from operator import mul
+from math import fsum, isnan, nan
 
 from ..base import V, DV, DualRepMixin, ParamMixin
-from ...system import Process, Event, Priority, PROCESS, Site
+from ...system import Process, Event, Priority, PROCESS, Site, UpdateSort
 from ...knowledge import Family, Atoms
-from ...numdicts import NumDict, KeyForm
+from ...numdicts import NumDict, KeyForm, Key
 
 
 class Train(Flag):
@@ -54,6 +58,9 @@ class Layer(DualRepMixin, Process):
     train: Train
     fw_by: KeyForm
     bw_by: KeyForm
+    _plan: tuple[list[Key], list[Key], list[list[Key]], list[list[Key]]] | None
+    _frozen: Train | None
+    _values: tuple[list[list[float]], list[float]] | None
 
     def __init__(self, 
         name: str, 
@@ -77,32 +84,48 @@ class Layer(DualRepMixin, Process):
         self.weights = Site(idx_in * idx_out, {}, 0.0, l)
         self.fw_by = idx_in.kf * idx_out.kf.agg
         self.bw_by = idx_in.kf.agg * idx_out.kf
+        self._plan = None
+        self._frozen = None
+        self._values = None
         self.init_weights(init_sd)
         self._connect_to_optimizer()
 
     def init_weights(self, sd: float = 1e-2) -> None:
-        with self.bias[0].mutable():
-            self.bias[0].reset()
-        with self.weights[0].mutable():
-            self.weights[0].reset()
+        self._values = None
         if self.afunc:
             scale = sd * self.afunc.scale(self) 
         else: 
             scale = sd / (1 + len(self.input))
-        if Train.BIAS in self.train:
-            bias_sd = self.bias[0].const().scale(x=scale)
-            bias_init = (self.bias[0]
-                .const(c=0.0)
-                .normalvariate(bias_sd, c=self.bias.const))
-            with self.bias[0].mutable():
-                self.bias[0].update(bias_init.d)
-        if Train.WEIGHTS in self.train:
-            weight_sd = self.weights[0].const().scale(x=scale)
-            weight_init = (self.weights[0]
-                .const(c=0.0)
-                .normalvariate(weight_sd, c=self.weights.const))
-            with self.weights[0].mutable():
-                self.weights[0].update(weight_init.d)
+        # Draws are made in index order, as in NumDict.normalvariate(), 
+        # straight into fresh parameter data; this skips the intermediate 
+        # NumDicts and per-key membership checks of update()
+        for flag, site in (
+            (Train.BIAS, self.bias), (Train.WEIGHTS, self.weights)
+        ):
+            d = {}
+            if flag in self.train:
+                d = {k: normalvariate(0.0, scale) for k in site.index}
+            site.data[0] = NumDict(site.index, d, site.const, False)
+
+    def freeze(self) -> None:
+        """
+        Fix weights and bias at their current values for inference.
+
+        A frozen layer is excluded from training, and its forward pass reads 
+        weight and bias values captured in its propagation plan instead of 
+        looking them up on every pass. Use thaw() to resume training.
+        """
+        if self._frozen is None:
+            self._frozen = self.train
+            self.train = Train.NIL
+            self._values = None
+
+    def thaw(self) -> None:
+        """Undo freeze(), restoring the train flag the layer had before."""
+        if self._frozen is not None:
+            self.train = self._frozen
+            self._frozen = None
+            self._values = None
 
     def _connect_to_optimizer(self):
         try:
@@ -120,21 +143,119 @@ class Layer(DualRepMixin, Process):
         return NotImplemented
 
     def resolve(self, event: Event) -> None:
-        updates = [ud for ud in event.updates if isinstance(ud, Site.Update)]
-        if self.input.affected_by(*updates):
+        updates = event.site_updates
+        # Only sort updates can invalidate the plan; they are looked for only 
+        # when the event carries something other than site updates
+        if len(updates) != len(event.updates):
+            index = self.weights.index
+            if any(isinstance(ud, UpdateSort) and index.depends_on(ud.sort) 
+                for ud in event.updates):
+                self._plan = None
+                self._values = None
+        if self.input.affected_by_any(updates):
             self.forward()
-        if self.main.affected_by(*updates, grad=True):
+        if self.main.affected_by_any(updates, grad=True):
             self.backward()
 
+    def compile(self) -> None:
+        """
+        Build the propagation plan now rather than on first use.
+
+        Plans are rebuilt automatically after changes to the keyspace.
+        """
+        self._plan = self._compile_plan()
+        self._values = None
+
+    def _compile_plan(self) -> tuple[
+        list[Key], list[Key], list[list[Key]], list[list[Key]]
+    ]:
+        """
+        Lay the weight index out as a dense grid of weight keys.
+
+        Returns input keys, output keys, and the grid by rows (one per output, 
+        aligned with input keys) and by columns (one per input, aligned with 
+        output keys); see BottomUp._compile_plan(). The grid lets each pass 
+        read every input once and form products with map(). Weight values are 
+        not captured, as they change with every optimizer step.
+        """
+        weights = self.weights[0]
+        to_input = self.input.index.kf.reductor(self.fw_by)
+        to_main = self.bw_by.reductor(weights.i.kf)
+        inputs: dict[Key, None] = {}
+        grid: dict[Key, dict[Key, Key]] = {}
+        for k in weights.i:
+            x = to_input(k)
+            inputs[x] = None
+            grid.setdefault(to_main(k), {})[x] = k
+        # Weights span the full product of input and output keys, so the grid 
+        # has no holes
+        ins, outs = list(inputs), list(grid)
+        rows = [[grid[y][x] for x in ins] for y in outs]
+        cols = [list(col) for col in zip(*rows)]
+        return ins, outs, rows, cols
+
+    def _rows(self) -> tuple[list[list[float]], list[float]]:
+        """
+        Read current weight and bias values in plan order.
+
+        Values are kept for reuse while the layer is frozen.
+        """
+        if self._plan is None:
+            self._plan = self._compile_plan()
+        if self._values is not None:
+            return self._values
+        _, outs, rows, _ = self._plan
+        weights, bias = self.weights[0], self.bias[0]
+        wd, wc, bd, bc = weights.d, weights.c, bias.d, bias.c
+        values = (
+            [list(map(wd.get, ws, repeat(wc))) for ws in rows], 
+            list(map(bd.get, outs, repeat(bc))))
+        if self._frozen is not None:
+            self._values = values
+        return values
+
+    def evaluate(self, inputs: Sequence[NumDict]) -> list[NumDict]:
+        """
+        Compute activations for a batch of inputs without scheduling events.
+
+        Weight and bias values are looked up once for the whole batch. The 
+        sites of the layer are left untouched.
+        """
+        wrows, bs = self._rows()
+        ins, outs, _, _ = self._plan # type: ignore
+        c = fsum((0.0, self.bias[0].c))
+        outputs = []
+        for input in inputs:
+            xs = list(map(input.d.get, ins, repeat(input.c)))
+            wsum = NumDict(self.main.index, 
+                {k: fsum(map(mul, ws, xs)) + b 
+                 for k, ws, b in zip(outs, wrows, bs)}, 
+                c, False)
+            outputs.append(self.afunc(wsum) if self.afunc else wsum)
+        return outputs
+
     def forward(self, 
         dt: timedelta = timedelta(), 
         priority: Priority = Priority.PROPAGATION
     ) -> None:
         """Compute and propagate forward activations."""
-        wsum = (self.weights[0]
-            .mul(self.input[0], by=self.fw_by)
-            .sum(by=self.bw_by)
-            .sum(self.bias[0]))
+        if self._plan is None:
+            self._plan = self._compile_plan()
+        ins, outs, rows, _ = self._plan
+        input, weights, bias = self.input[0], self.weights[0], self.bias[0]
+        xs = list(map(input.d.get, ins, repeat(input.c)))
+        bc = bias.c
+        # Weighted sums and bias are computed in a single pass
+        if self._frozen is not None:
+            wrows, bs = self._rows()
+            d = {k: fsum(map(mul, ws, xs)) + b 
+                for k, ws, b in zip(outs, wrows, bs)}
+        else:
+            wd, wc, bd = weights.d, weights.c, bias.d
+            d = {k: fsum(map(mul, map(wd.get, ws, repeat(wc)), xs)) 
+                    + bd.get(k, bc) 
+                for k, ws in zip(outs, rows)}
+        wsum = NumDict(self.main.index, d, fsum((0.0, bc)), False)
         main = wsum
         if self.afunc:
             main = self.afunc(wsum)            
@@ -157,22 +278,42 @@ class Layer(DualRepMixin, Process):
         signals. 
         
         Typically, gradient sites will be cleared by an optimizer after it has 
-        consumed their data for weight updates. 
+        consumed their data for weight updates. Gradients are only computed 
+        for parameters selected by the train flag of the layer; errors are 
+        always backpropagated to the input site.
         """
+        if self._plan is None:
+            self._plan = self._compile_plan()
+        ins, outs, rows, cols = self._plan
         grad_wsum = self.main.grad[0]
         if self.afunc:
             grad_wsum = grad_wsum.mul(self.afunc.grad(self.wsum[-1]))
-        grad_bias = grad_wsum
-        grad_weights = (self.weights[-1].const()
-            .mul(self.input[-1], grad_wsum, by=(self.fw_by, self.bw_by)))
-        back = (self.weights[-1]
-            .mul(grad_wsum, by=self.bw_by)
-            .sum(by=self.fw_by)) 
-        self.system.schedule(self.backward,
-            self.input.update(back, grad=True),
-            self.bias.update(grad_bias, Site.add_inplace, grad=True),
-            self.weights.update(grad_weights, Site.add_inplace, grad=True),
-            dt=dt, priority=priority)
+        input, weights = self.input[-1], self.weights[-1]
+        xc, wc, gc = input.c, weights.c, grad_wsum.c
+        gs = list(map(grad_wsum.d.get, outs, repeat(gc)))
+        wget = weights.d.get
+        back_c = wc * gc
+        back = NumDict(self.input.index, 
+            {x: fsum(map(mul, map(wget, ws, repeat(wc)), gs)) 
+             for x, ws in zip(ins, cols)}, 
+            back_c if back_c == 0.0 or isnan(back_c) else nan, False)
+        uds = [self.input.update(back, grad=True)]
+        # Untrained parameters get no gradients; nothing would consume or 
+        # clear them
+        if Train.BIAS in self.train:
+            uds.append(
+                self.bias.update(grad_wsum, Site.add_inplace, grad=True))
+        if Train.WEIGHTS in self.train:
+            # Gradients are read off the plan directly, with no intermediate 
+            # product NumDicts
+            xs = list(map(input.d.get, ins, repeat(xc)))
+            grad_weights_d = {}
+            for ws, g in zip(rows, gs):
+                grad_weights_d.update(zip(ws, map(mul, xs, repeat(g))))
+            uds.append(self.weights.update(
+                NumDict(self.weights.index, grad_weights_d, xc * gc, False), 
+                Site.add_inplace, grad=True))
+        self.system.schedule(self.backward, *uds, dt=dt, priority=priority)
         
 
 class Optimizer[P: Atoms](ParamMixin, Process):
@@ -180,21 +321,37 @@ class Optimizer[P: Atoms](ParamMixin, Process):
     A neural network optimization process. 
 
     Issues updates to weights and biases of a collection of layers. 
+
+    Trainable sites of client layers are kept in a flat list of targets, in 
+    the order layers were added, so that updates walk one sequence instead of 
+    re-deriving the sites of each layer on every step.
     """
 
     Params: type[P]
     p: P
     params: Site
     layers: set[Layer]
+    _targets: list[tuple[Layer, Train, Site]]
 
     def __init__(self, name: str, p: Family, **params: float) -> None:
         super().__init__(name)
         self.p, self.params = self._init_params(p, type(self).Params, **params)
         self.layers = set()
+        self._targets = []
 
     def add(self, layer: Layer) -> None:
         """Include layer in future updates."""
+        if layer in self.layers:
+            return
         self.layers.add(layer)
+        self._targets.append((layer, Train.BIAS, layer.bias))
+        self._targets.append((layer, Train.WEIGHTS, layer.weights))
+
+    def _noise_sd(self, layer: Layer, sd: float) -> float:
+        """Scale gradient noise bound sd to layer."""
+        if layer.afunc:
+            return sd * layer.afunc.scale(layer) 
+        return sd / len(layer.input[0])
 
     def update(self, 
         dt: timedelta = timedelta(), 
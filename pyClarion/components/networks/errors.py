@@ -1,5 +1,6 @@
 from typing import Callable
 from datetime import timedelta
+import math
 
 from .base import ErrorSignal
 from ..base import DualRepMixin, ParamMixin, D, V, DV
@@ -150,16 +151,27 @@ class TDError(ParamMixin, DualRepMixin, ErrorSignal):
     ) -> None:
         gamma = self.params[0][~self.p.gamma]
         n = len(self.reward)
-        main = (self.func(self)
-            .scale(x=gamma ** n)
-            .sum(*(rwd.sum().scale(x=gamma ** (n - 1 - t)) 
-                for t, rwd in enumerate(self.reward.data)))
-            .with_default(c=self.main.const)
-            .sub(self.qvals[-1])
-            .mul(self.action[-1])
-            .neg())
+        future = self.func(self)
+        # Discounted rewards are scalars; summing a NumDict leaves its total 
+        # in the default value
+        rewards = [rwd.sum().c * gamma ** (n - 1 - t) 
+            for t, rwd in enumerate(self.reward.data)]
+        gn = gamma ** n
+        fd, fc = future.d, future.c
+        qvals, action = self.qvals[-1], self.action[-1]
+        qd, qc = qvals.d, qvals.c
+        ad, ac = action.d, action.c
+        error, cost = {}, {}
+        for k in self.main.index:
+            e = error[k] = -(
+                (math.fsum((fd.get(k, fc) * gn, *rewards)) - qd.get(k, qc)) 
+                * ad.get(k, ac))
+            cost[k] = math.pow(e, 2) * .5
+        c = -((self.main.const - qc) * ac)
+        main = NumDict(self.main.index, error, c, False)
         self.system.schedule(self.update,
-            self.main.update(main.pow(x=2).scale(x=.5)),
+            self.main.update(
+                NumDict(self.main.index, cost, math.pow(c, 2) * .5, False)),
             self.input.update(main, grad=True),
             self.reward.update({}),
             self.qvals.update(self.input[0]),
@@ -1,8 +1,11 @@
 from datetime import timedelta
+import random
+import math
 
-from .base import Optimizer, Train, Layer
+from .base import Optimizer, Layer
 from ...system import Priority, Site
 from ...knowledge import Family, Atoms, Atom
+from ...numdicts import NumDict
 
 
 class SGD(Optimizer):
@@ -38,15 +41,10 @@ class SGD(Optimizer):
         sd_ = self.params[0][~self.p.sd]
         l2 = self.params[0][~self.p.l2]
         uds = []
-        for layer in self.layers:
-            if layer.afunc:
-                sd = sd_ * layer.afunc.scale(layer) 
-            else: 
-                sd = sd_ / len(layer.input[0])
-            if Train.BIAS in layer.train:
-                uds.extend(self._update(layer.bias, lr, sd, l2))
-            if Train.WEIGHTS in layer.train:
-                uds.extend(self._update(layer.weights, lr, sd, l2))
+        for layer, flag, param in self._targets:
+            if flag in layer.train:
+                sd = self._noise_sd(layer, sd_)
+                uds.extend(self._update(param, lr, sd, l2))
         self.system.schedule(self.update, *uds, dt=dt, priority=priority)
 
     def _update(self, 
@@ -85,6 +83,7 @@ class Adam(Optimizer):
     wm2: dict[str, Site]
     bm1: dict[str, Site]
     bm2: dict[str, Site]
+    _moments: list[tuple[Site, Site]]
 
     def __init__(self, 
         name: str, 
@@ -103,13 +102,19 @@ class Adam(Optimizer):
         self.wm2 = {}
         self.bm1 = {}
         self.bm2 = {}
+        # Moment sites, parallel to self._targets
+        self._moments = []
 
     def add(self, layer: Layer) -> None:
+        if layer in self.layers:
+            return
         super().add(layer)
         self.wm1[layer.name] = Site(layer.weights.index, {}, 0.0)
         self.wm2[layer.name] = Site(layer.weights.index, {}, 0.0)
         self.bm1[layer.name] = Site(layer.bias.index, {}, 0.0)
         self.bm2[layer.name] = Site(layer.bias.index, {}, 0.0)
+        self._moments.append((self.bm1[layer.name], self.bm2[layer.name]))
+        self._moments.append((self.wm1[layer.name], self.wm2[layer.name]))
 
     def update(self,
         dt: timedelta = timedelta(), 
@@ -126,19 +131,11 @@ class Adam(Optimizer):
         bt2 = self.params[0][~self.p.bt2]
         ep = self.params[0][~self.p.ep]
         uds = []
-        for layer in self.layers:
-            if layer.afunc:
-                sd = sd_ * layer.afunc.scale(layer) 
-            else: 
-                sd = sd_ / len(layer.input[0])
-            if Train.BIAS in layer.train:
-                m, v = self.bm1[layer.name], self.bm2[layer.name]
-                uds.extend(self._update(
-                    layer.bias, m, v, lr, sd, l2, b1, b2, bt1, bt2, ep))
-            if Train.WEIGHTS in layer.train:
-                m, v = self.wm1[layer.name], self.wm2[layer.name]
+        for (layer, flag, param), (m, v) in zip(self._targets, self._moments):
+            if flag in layer.train:
+                sd = self._noise_sd(layer, sd_)
                 uds.extend(self._update(
-                    layer.weights, m, v, lr, sd, l2, b1, b2, bt1, bt2, ep))
+                    param, m, v, lr, sd, l2, b1, b2, bt1, bt2, ep))
         bt1 = bt1 * b1
         bt2 = bt2 * b2
         uds.append(self.params.update({~self.p.bt1: bt1, ~self.p.bt2: bt2},
@@ -158,15 +155,30 @@ class Adam(Optimizer):
         bt2: float,
         ep: float
     ) -> tuple[Site.Update, Site.Update, Site.Update, Site.Update]:
-        m_next = m[0].scale(x=b1).sum(param.grad[-1].scale(x=1 - b1))
-        v_next = v[0].scale(x=b2).sum(param.grad[-1].pow(x=2).scale(x=1 - b2))
-        m_hat = m_next.scale(x=1/(1 - bt1))
-        v_hat = v_next.scale(x=1/(1 - bt2))
-        g_hat = m_hat.div(v_hat.pow(x=0.5).shift(x=ep))
-        delta = (g_hat
-            .normalvariate(g_hat.abs().scale(x=sd), c=param.const)
-            .sum(param[-1].scale(x=l2))
-            .scale(x=-lr)) # Don't miss negative here!
+        # Computes the moment updates and the noisy, regularized step for 
+        # each parameter in a single pass over the index, rather than through 
+        # a chain of elementwise NumDict operations. The arithmetic matches 
+        # that chain operation for operation.
+        grad, p, m0, v0 = param.grad[-1], param[-1], m[0], v[0]
+        gd, gc = grad.d, grad.c
+        pd, pc = p.d, p.c
+        md, mc = m0.d, m0.c
+        vd, vc = v0.d, v0.c
+        a1, a2 = 1 - b1, 1 - b2
+        s1, s2 = 1/(1 - bt1), 1/(1 - bt2)
+        normalvariate, pow, fabs = random.normalvariate, math.pow, math.fabs
+        m_d, v_d, delta_d = {}, {}, {}
+        for k in param.index:
+            g = gd.get(k, gc)
+            m_k = m_d[k] = md.get(k, mc) * b1 + g * a1
+            v_k = v_d[k] = vd.get(k, vc) * b2 + pow(g, 2) * a2
+            g_hat = m_k * s1 / (pow(v_k * s2, 0.5) + ep)
+            delta_d[k] = (normalvariate(g_hat, fabs(g_hat) * sd) 
+                + pd.get(k, pc) * l2) * -lr # Don't miss negative here!
+        m_next = NumDict(m.index, m_d, mc * b1 + gc * a1, False)
+        v_next = NumDict(v.index, v_d, vc * b2 + pow(gc, 2) * a2, False)
+        delta = NumDict(param.index, delta_d, 
+            (param.const + pc * l2) * -lr, False)
         return (
             param.update(delta, Site.add_inplace), 
             param.update({}, grad=True), 
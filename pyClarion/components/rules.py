@@ -1,4 +1,5 @@
 from datetime import timedelta
+import logging
 
 from ..system import Process, Event, Priority, Site
 from ..knowledge import Family, Sort, Atom, Rule
@@ -67,7 +68,8 @@ class ActionRules(Process):
         dt: timedelta = timedelta(), 
         priority: int = Priority.PROPAGATION
     ) -> None:
-        print("action rule updated occured")
+        if self.system.logger.isEnabledFor(logging.DEBUG):
+            self.system.logger.debug("    Updating action rule activations")
         choice = self.choice.main[0]
         main = (self.rules.riw[0]
             .mul(choice, by=self.mul_by)
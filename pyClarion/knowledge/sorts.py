@@ -1,3 +1,6 @@
+from itertools import islice
+
+from ..numdicts import Key
 from .base import Sort, Var
 from .terms import Atom, Compound, Chunk, Rule
 
@@ -18,6 +21,26 @@ class Atoms(Sort[Atom]):
     def __call__(self, name: str) -> Var:
         return self._vars_.setdefault(name, Var(name, self))
 
+    def _bulk_add_(self, n: int, prefix: str = "n") -> None:
+        """
+        Add n new atoms named by prefix and successive counter values.
+
+        Equivalent to n assignments self[f"{prefix}{i}"] = Atom(), minus the 
+        name and parent checks, which cannot fail for fresh atoms. As with 
+        assignment, each atom is inserted and then announced to all observers 
+        before the next one is added.
+        """
+        if not prefix.isidentifier():
+            raise ValueError(f"Invalid keyspace name prefix: '{prefix}'")
+        members, observers = self._members_, self._observers_
+        for i in islice(self._counter_, n):
+            atom = Atom()
+            atom._name_ = name = f"{prefix}{i}"
+            atom._parent_ = self
+            members[Key(name)] = atom
+            for obs in observers:
+                obs.on_add(self, atom)
+
 
 class Compounds[C: Compound](Sort[C]):
     """A data sort for compound terms."""
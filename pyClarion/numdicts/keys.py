@@ -1,7 +1,7 @@
 from typing import Self, Type, Sequence, Callable, cast
 from dataclasses import dataclass
 from collections import deque
-from functools import cache
+from functools import cache, lru_cache
 import re
 
 from .exc import ValidationError
@@ -77,6 +77,10 @@ class Key(tuple[tuple[str, int], ...]):
 
     def __repr__(self) -> str:
         return f"Key({repr(str(self))})"
+
+    def __reduce__(self):
+        # Rebuild from the string form; __new__ rejects the raw tuple
+        return (type(self), (str(self),))
     
     def __bool__(self) -> bool:
         return self != Key()
@@ -266,9 +270,11 @@ class KeyForm:
         k1 = self.as_key(); k2 = other.as_key()
         return bool(k1.find_in(k2, crit=self._crit))
     
+    @sig_cache
     def __mul__(self: Self, other: Self) -> "KeyForm":
         return KeyForm.from_key(self.as_key() * other.as_key())
         
+    @sig_cache
     def reductor(self, other: "KeyForm") -> Callable[[Key], Key]:
         k1 = self.as_key(); k2 = other.as_key()
         if not self <= other:
@@ -290,6 +296,9 @@ class KeyForm:
             if m:
                 cuts.append((i, m))
             S += deg 
+        # Reductors live as long as the process, so the reduction memo is 
+        # bounded; it only needs to cover the keys of one grouping pass
+        @lru_cache(maxsize=4096)
         def reduce(key: Key) -> Key:
             for i, m in reversed(cuts):
                 key, _ = key.cut(i, m)
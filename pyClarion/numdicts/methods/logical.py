@@ -115,9 +115,10 @@ def argmax(
             if isinstance(by, (str, nd.Key)):
                 by = nd.KeyForm.from_key(nd.Key(by))
             reduce = by.reductor(self.i.kf)
+            d, c = self._d, self._c
             kmax, vmax = {}, {}
             for k in it:
-                group, v = reduce(k), self[k]
+                group, v = reduce(k), d.get(k, c)
                 if vmax.setdefault(group, -math.inf) < v:
                     kmax[group] = k
                     vmax[group] = v
@@ -148,9 +149,10 @@ def argmin(
             if isinstance(by, (str, nd.Key)):
                 by = nd.KeyForm.from_key(nd.Key(by))
             reduce = by.reductor(self.i.kf)
+            d, c = self._d, self._c
             kmin, vmin = {}, {}
             for k in it:
-                group, v = reduce(k), self[k]
+                group, v = reduce(k), d.get(k, c)
                 if v < vmin.setdefault(group, math.inf):
                     kmin[group] = k
                     vmin[group] = v
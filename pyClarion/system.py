@@ -71,12 +71,21 @@ class Event:
     A simulation event.
     
     Events are ordered first by time, then by priority, then by number.
+
+    Site updates are picked out of updates once, on construction, and kept in 
+    site_updates for use with Site.affected_by_any().
     """
     time: timedelta
     source: Callable
     updates: Sequence[Update]
     priority: int
     number: int
+    site_updates: tuple["Site.Update", ...] = field(
+        init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        self.site_updates = tuple(
+            ud for ud in self.updates if isinstance(ud, Site.Update))
 
     def __repr__(self) -> str:
         if ismethod(self.source) and isinstance(self.source.__self__, Process):
@@ -151,6 +160,16 @@ class Clock:
         priority: int
     ) -> Event:
         """Construct an event scheduled at dt from the current timepoint."""
+        return self._event(dt, src, uds, priority)
+
+    def _event(self, 
+        dt: timedelta, 
+        src: Callable, 
+        uds: tuple[Update, ...], 
+        priority: int
+    ) -> Event:
+        # Takes the update tuple as is, so callers holding one already need 
+        # not unpack it only to have it repacked.
         if dt < timedelta():
             raise ValueError("Cannot schedule an event in the past.")
         t = self.time + dt
@@ -178,7 +197,10 @@ class Process:
         """
         A simulated system.
 
-        Maintains global simulation data.
+        Maintains global simulation data. Pending events are kept in queue as 
+        a binary heap (see heapq), so scheduling and advancing are O(log n) in 
+        the number of pending events. Code that filters or reorders queue in 
+        place must restore the heap invariant (e.g., with heapq.heapify()).
         """
 
         root: Root = field(default_factory=Root)
@@ -208,7 +230,7 @@ class Process:
             priority: int = Priority.PROPAGATION,
         ) -> None:
             heapq.heappush(self.queue, 
-                self.clock.event(dt, src, *uds, priority=priority))
+                self.clock._event(dt, src, uds, priority))
 
         def advance(self) -> Event:
             """Process the next event in the queue."""
@@ -419,3 +441,18 @@ class Site:
             if isinstance(ud, UpdateSort) and self.index.depends_on(ud.sort):
                 return True
         return False
+
+    def affected_by_any(self, 
+        updates: Sequence["Site.Update"], 
+        grad: bool = False
+    ) -> bool:
+        """
+        Check if any of the given site updates targets this site.
+
+        Faster version of affected_by() for updates already known to be site 
+        updates, such as Event.site_updates.
+        """
+        for ud in updates:
+            if ud.site is self and ud.grad == grad:
+                return True
+        return False
@@ -0,0 +1,42 @@
+import unittest
+
+from pyClarion.knowledge import Atoms, Atom
+from pyClarion.numdicts.keyspaces import KSObserver
+
+
+class Recorder(KSObserver):
+    def __init__(self, tag, log):
+        self.tag = tag
+        self.log = log
+
+    def on_add(self, parent, child):
+        self.log.append((self.tag, child._name_, len(parent._members_)))
+
+
+def observe(sort, log):
+    observers = [Recorder(tag, log) for tag in ("a", "b")]
+    for obs in observers:
+        obs.subscribe(sort)
+    return observers
+
+
+class BulkAddTestCase(unittest.TestCase):
+    def test_bulk_add_matches_assignment_order(self):
+        expected, actual = [], []
+        s1, s2 = Atoms(), Atoms()
+        obs1 = observe(s1, expected)
+        obs2 = observe(s2, actual)
+        for _ in range(3):
+            s1[f"n{next(s1._counter_)}"] = Atom()
+        s2._bulk_add_(3)
+        self.assertEqual(len(actual), 6)
+        self.assertEqual(
+            [(name, n) for _, name, n in actual], 
+            [(name, n) for _, name, n in expected])
+        # Each atom is announced to every observer before the next is added
+        self.assertEqual([n for _, _, n in actual], [1, 1, 2, 2, 3, 3])
+        self.assertEqual(list(s1._members_), list(s2._members_))
+
+
+if __name__ == "__main__":
+    unittest.main()